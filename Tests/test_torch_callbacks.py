@@ -0,0 +1,138 @@
+import os
+import tempfile
+import unittest
+
+from mltu.torch.callbacks import EarlyStopping, ModelCheckpoint, TensorBoard
+
+class StubModel:
+    """ Records save calls instead of serializing a model """
+    def __init__(self):
+        self.saved = []
+        self.stop_training = False
+
+    def save(self, path: str):
+        self.saved.append(path)
+
+class TestModelCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tmp_dir.name, "model.pt")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def run_epochs(self, mode: str, values: list, save_best_only: bool = True):
+        checkpoint = ModelCheckpoint(self.filepath, mode=mode, save_best_only=save_best_only)
+        checkpoint.model = StubModel()
+        checkpoint.on_train_begin()
+        for epoch, value in enumerate(values, start=1):
+            checkpoint.on_epoch_end(epoch, logs={"val_loss": value})
+
+        return checkpoint
+
+    def test_improvement_saves(self):
+        checkpoint = self.run_epochs("min", [1.0, 0.5, 0.7])
+        self.assertEqual(len(checkpoint.model.saved), 2)
+        self.assertEqual(checkpoint.best, 0.5)
+
+    def test_tie_does_not_save_in_equal_modes(self):
+        # Test min_equal mode, tie with best is not saved
+        checkpoint = self.run_epochs("min_equal", [1.0, 0.5, 0.5])
+        self.assertEqual(len(checkpoint.model.saved), 2)
+
+        # Test max_equal mode, tie with best is not saved
+        checkpoint = self.run_epochs("max_equal", [0.5, 1.0, 1.0])
+        self.assertEqual(len(checkpoint.model.saved), 2)
+
+    def test_tie_saves_when_not_save_best_only(self):
+        checkpoint = self.run_epochs("min_equal", [1.0, 0.5, 0.5], save_best_only=False)
+        self.assertEqual(len(checkpoint.model.saved), 3)
+
+class TestEarlyStopping(unittest.TestCase):
+
+    # mode: (values, expected stopped_epoch, expected best), patience 2 and min_delta 0.5
+    cases = {
+        "min": ([2.0, 1.75, 1.25, 1.0, 1.0, 0.0], 5, 1.25),
+        "max": ([0.0, 0.25, 0.75, 1.0, 1.0, 2.0], 5, 0.75),
+        "min_equal": ([2.0, 1.5, 1.25, 1.25, 0.0], 4, 1.5),
+        "max_equal": ([0.0, 0.5, 0.75, 0.75, 2.0], 4, 0.5),
+    }
+
+    def run_epochs(self, mode: str, values: list, model=None):
+        early_stopping = EarlyStopping(patience=2, min_delta=0.5, mode=mode)
+        if model is not None:
+            early_stopping.model = model
+        early_stopping.on_train_begin()
+        for epoch, value in enumerate(values, start=1):
+            early_stopping.on_epoch_end(epoch, logs={"val_loss": value})
+
+        return early_stopping
+
+    def test_modes_without_model(self):
+        for mode, (values, stopped_epoch, best) in self.cases.items():
+            with self.subTest(mode=mode):
+                # last value would improve, but comparison stops once patience has run out
+                early_stopping = self.run_epochs(mode, values)
+                self.assertEqual(early_stopping.stopped_epoch, stopped_epoch)
+                self.assertEqual(early_stopping.wait, 2)
+                self.assertEqual(early_stopping.best, best)
+
+    def test_calls_after_stop_change_nothing(self):
+        early_stopping = self.run_epochs("min", self.cases["min"][0])
+        early_stopping.on_epoch_end(10, logs={"val_loss": -1.0})
+        self.assertEqual(early_stopping.stopped_epoch, 5)
+        self.assertEqual(early_stopping.wait, 2)
+
+    def test_unknown_mode_raises(self):
+        with self.assertRaises(ValueError):
+            EarlyStopping(mode="median")
+
+        # mode changed after construction is validated at train begin
+        early_stopping = EarlyStopping()
+        early_stopping.mode = "median"
+        with self.assertRaises(ValueError):
+            early_stopping.on_train_begin()
+
+    def test_stop_training_is_set_on_model(self):
+        model = StubModel()
+        self.run_epochs("max", self.cases["max"][0], model=model)
+        self.assertTrue(model.stop_training)
+
+
+class StubWriter:
+    """ Records add_scalar calls instead of writing TensorBoard events """
+    def __init__(self):
+        self.scalars = []
+
+    def add_scalar(self, tag: str, value: float, step: int):
+        self.scalars.append((tag, value, step))
+
+class TestTensorBoard(unittest.TestCase):
+
+    def test_batch_scalars(self):
+        tensorboard = TensorBoard(scalar_every_n_batches=2)
+        tensorboard.writer = StubWriter()
+        for batch in range(1, 6):
+            tensorboard.on_train_batch_end(batch, logs={"loss": float(batch)})
+
+        # step is a global batch counter, only every second batch is logged
+        self.assertEqual(tensorboard.writer.scalars, [("Loss/train_batch", 2.0, 2), ("Loss/train_batch", 4.0, 4)])
+
+    def test_batch_scalars_disabled_by_default(self):
+        tensorboard = TensorBoard()
+        tensorboard.writer = StubWriter()
+        tensorboard.on_train_batch_end(1, logs={"loss": 1.0})
+        self.assertEqual(tensorboard.writer.scalars, [])
+
+    def test_default_comment_is_timestamp(self):
+        comment = TensorBoard().comment
+        self.assertNotEqual(comment, "None")
+        self.assertRegex(comment, r"^\d{8}-\d{6}$")
+
+    def test_comment_is_kept(self):
+        self.assertEqual(TensorBoard(comment="run1").comment, "run1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,11 @@
+import io
 import os
-import onnx
+import math
+import torch
 import logging
-import numpy as np
+import operator
 from datetime import datetime
 
-import torch.onnx
-from torch.utils.tensorboard import SummaryWriter
-
 class Callback:
     """ Base class used to build new callbacks."""
     def __init__(
@@ -56,12 +55,12 @@ class Callback:
     def get_monitor_value(self, logs: dict):
         logs = logs or {}
         monitor_value = logs.get(self.monitor)
-        if monitor_value is None:
-            logging.warning(
+        if monitor_value is None and self.logger.isEnabledFor(logging.WARNING):
+            self.logger.warning(
                 "Early stopping conditioned on metric `%s` "
                 "which is not available. Available metrics are: %s",
                 self.monitor,
-                ",".join(list(logs.keys())),
+                ",".join(logs),
             )
         return monitor_value
 
@@ -84,40 +83,57 @@ class EarlyStopping(Callback):
         self.wait = None
         self.stopped_epoch = None
         self.best = None
+        self._stopped = False
+
+        self._resolve_mode()
 
+    def _resolve_mode(self):
+        """ Validate mode and resolve comparison and signed min_delta from current mode and min_delta, 
+        called at construction and at the start of every training run. Monitor values are plain python scalars 
+        """
         if self.mode not in ["min", "max", "max_equal", "min_equal"]:
             raise ValueError(
                 "EarlyStopping mode %s is unknown, "
                 "please choose one of min, max, max_equal, min_equal" % self.mode
             )
+
+        self._cmp = {
+            "min": operator.lt,
+            "max": operator.gt,
+            "min_equal": operator.le,
+            "max_equal": operator.ge,
+        }[self.mode]
+        self._delta_sign = -self.min_delta if self.mode in ("min", "min_equal") else self.min_delta
         
     def on_train_begin(self, logs=None):
+        # pick up mode or min_delta changed after construction
+        self._resolve_mode()
         self.wait = 0
         self.stopped_epoch = 0
-        self.best = np.inf if self.mode == "min" or self.mode == "min_equal" else -np.Inf
+        self.best = math.inf if self.mode in ("min", "min_equal") else -math.inf
+        self._stopped = False
 
     def on_epoch_end(self, epoch: int, logs=None):
+        # nothing left to compare once patience has run out
+        if self._stopped:
+            return
+
         current = self.get_monitor_value(logs)
         if current is None:
             return
 
-        if self.mode == "min" and np.less(current, self.best - self.min_delta):
-            self.best = current
-            self.wait = 0
-        elif self.mode == "max" and np.greater(current, self.best + self.min_delta):
-            self.best = current
-            self.wait = 0
-        elif self.mode == "min_equal" and np.less_equal(current, self.best - self.min_delta):
-            self.best = current
-            self.wait = 0
-        elif self.mode == "max_equal" and np.greater_equal(current, self.best + self.min_delta):
+        current = float(current)
+        if self._cmp(current, self.best + self._delta_sign):
             self.best = current
             self.wait = 0
         else:
             self.wait += 1
             if self.wait >= self.patience:
                 self.stopped_epoch = epoch
-                self.model.stop_training = True
+                self._stopped = True
+                # model is bound by CallbacksHandler, callback may also be driven standalone
+                if getattr(self, "model", None) is not None:
+                    self.model.stop_training = True
 
     def on_train_end(self, logs=None):
         if self.stopped_epoch > 0 and self.verbose:
@@ -130,10 +146,10 @@ def assign_mode(mode: str):
             "please choose one of min, max, max_equal, min_equal" % mode
         )
 
-    if mode == "min": return np.less
-    elif mode == "max": return np.greater
-    elif mode == "min_equal": return np.less_equal
-    elif mode == "max_equal": return np.greater_equal
+    if mode == "min": return operator.lt
+    elif mode == "max": return operator.gt
+    elif mode == "min_equal": return operator.le
+    elif mode == "max_equal": return operator.ge
 
 class ModelCheckpoint(Callback):
     """ ModelCheckpoint callback to save the model after every epoch or the best model across all epochs."""
@@ -148,15 +164,18 @@ class ModelCheckpoint(Callback):
         """ ModelCheckpoint callback to save the model after every epoch or the best model across all epochs
         
         Args:
-            filepath (str): path to save the model file
+            filepath (str): path to save the model file, resolved to an absolute path against the working directory at construction time
             monitor (str, optional): metric to monitor. Defaults to "val_loss".
             verbose (bool, optional): verbosity mode. Defaults to False.
             save_best_only (bool, optional): if True, the latest best model according to the quantity monitored will not be overwritten. Defaults to True.
-            mode (str, optional): one of {min, max, max_equal, min_equal}. Defaults to "min".
+            mode (str, optional): one of {min, max, max_equal, min_equal}. A value that only ties the best never triggers a save, 
+                so with save_best_only=True min_equal and max_equal behave like min and max. Defaults to "min".
         """
         super(ModelCheckpoint, self).__init__()
 
-        self.filepath = filepath
+        # resolve path once, so every epoch's save reuses it
+        self.filepath = os.path.abspath(os.fspath(filepath))
+        self._dirname = os.path.dirname(self.filepath)
         self.monitor = monitor
         self.verbose = verbose
         self.mode = mode
@@ -166,18 +185,19 @@ class ModelCheckpoint(Callback):
         self.monitor_op = assign_mode(self.mode)
         
     def on_train_begin(self, logs=None):
-        self.best = np.inf if self.mode == "min" or self.mode == "min_equal" else -np.Inf
+        self.best = math.inf if self.mode in ("min", "min_equal") else -math.inf
 
         # create directory if not exist
-        if not os.path.exists(os.path.dirname(self.filepath)):
-            os.makedirs(os.path.dirname(self.filepath))
+        os.makedirs(self._dirname, exist_ok=True)
 
     def on_epoch_end(self, epoch: int, logs=None):
         current = self.get_monitor_value(logs)
         if current is None:
             return
 
-        if self.monitor_op(current, self.best):
+        current = float(current)
+        # a tie in min_equal/max_equal modes improves nothing, so the model is not serialized again
+        if current != self.best and self.monitor_op(current, self.best):
             previous = self.best
             self.best = current
             self.save_model(epoch, current, previous)
@@ -204,31 +224,137 @@ class ModelCheckpoint(Callback):
 
 class TensorBoard(Callback):
     """ TensorBoard basic visualizations. """
-    def __init__(self, log_dir: str = "logs", comment: str = None):
+    def __init__(
+        self, 
+        log_dir: str = "logs", 
+        comment: str = None,
+        max_queue: int = 1024,
+        flush_secs: int = 600,
+        histogram_every_n_epochs: int = 1,
+        histogram_bins: int = 64,
+        log_param_norms: bool = False,
+        scalar_every_n_batches: int = 0,
+        ):
         """ TensorBoard basic visualizations.
         
         Args:
             log_dir (str, optional): the path of the directory where to save the log files to be parsed by TensorBoard. Defaults to "logs".
             comment (str, optional): comment to append to the default log_dir. Defaults to None.
+            max_queue (int, optional): number of pending events queued before they are written to disk. Defaults to 1024.
+            flush_secs (int, optional): how often, in seconds, pending events are flushed to disk. Defaults to 600.
+            histogram_every_n_epochs (int, optional): log parameter histograms every n epochs, 0 disables them. Defaults to 1.
+            histogram_bins (int, optional): number of uniform bins used for parameter histograms, computed with torch.histc 
+                instead of TensorBoard's default exponential buckets. Defaults to 64.
+            log_param_norms (bool, optional): log L2 norm of every parameter each epoch, a cheap alternative to histograms. Defaults to False.
+            scalar_every_n_batches (int, optional): log training batch scalars every n batches under "<tag>_batch" tags, 0 disables them. 
+                The step is a global training batch counter that is not reset in on_train_begin, so it keeps counting across fit calls. Defaults to 0.
         """
         super(TensorBoard, self).__init__()
 
         self.log_dir = log_dir
+        self.max_queue = max_queue
+        self.flush_secs = flush_secs
+        self.histogram_every_n_epochs = histogram_every_n_epochs
+        self.histogram_bins = histogram_bins
+        self.log_param_norms = log_param_norms
+        self.scalar_every_n_batches = scalar_every_n_batches
+        self._train_step = 0
+        self._key_cache = {}
 
         self.writer = None
-        self.comment = str(comment) if not None else datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.comment = str(comment) if comment is not None else datetime.now().strftime("%Y%m%d-%H%M%S")
 
     def on_train_begin(self, logs=None):
         if self.writer is None:
-            self.writer = SummaryWriter(self.log_dir, comment=self.comment)
+            # imported lazily, tensorboard is only needed when this callback is used
+            from torch.utils.tensorboard import SummaryWriter
+            self.writer = SummaryWriter(
+                self.log_dir, 
+                comment=self.comment, 
+                max_queue=self.max_queue, 
+                flush_secs=self.flush_secs,
+                )
+
+        # walk the module tree once, parameter objects stay the same across epochs
+        self._params = list(self.model.model.named_parameters())
 
     def update_lr(self, epoch: int):
         for param_group in self.model.optimizer.param_groups:
             self.writer.add_scalar("learning_rate", param_group["lr"], epoch)
 
+    def _group_by_device(self, tensors: list):
+        """ Group tensors by the device they are stored on, so results can be stacked per device
+
+        Args:
+            tensors (list): list of torch.Tensor
+
+        Returns:
+            dict: device mapped to list of (index, tensor) pairs
+        """
+        groups = {}
+        for index, tensor in enumerate(tensors):
+            groups.setdefault(tensor.device, []).append((index, tensor))
+
+        return groups
+
     def update_histogram(self, epoch: int):
-        for name, param in self.model.model.named_parameters():
-            self.writer.add_histogram(name, param.clone().cpu().data.numpy(), epoch)
+        summaries = [None] * len(self._params)
+        with torch.no_grad():
+            # histc has no deterministic CUDA kernel, compute on host when deterministic algorithms are enforced
+            on_host = torch.are_deterministic_algorithms_enabled()
+
+            # only small per-parameter summaries are kept across iterations, float copies of parameters are not accumulated
+            results = []
+            for _, param in self._params:
+                values = param.detach()
+                if on_host and values.is_cuda:
+                    values = values.cpu()
+                values = values.float().flatten()
+                counts = torch.histc(values, bins=self.histogram_bins)
+                stats = torch.stack([values.min(), values.max(), values.sum(), values.dot(values)])
+                results.append(torch.cat([stats, counts]))
+
+            # one device to host copy per device
+            for group in self._group_by_device(results).values():
+                indices, tensors = zip(*group)
+                for index, summary in zip(indices, torch.stack(tensors).tolist()):
+                    summaries[index] = summary
+
+        for (name, param), summary in zip(self._params, summaries):
+            min_value, max_value, sum_value, sum_squares = summary[:4]
+
+            # histc expands the range of constant tensors the same way
+            low, high = (min_value - 1, max_value + 1) if min_value == max_value else (min_value, max_value)
+            bucket_limits = [low + (high - low) * (i + 1) / self.histogram_bins for i in range(self.histogram_bins)]
+
+            self.writer.add_histogram_raw(
+                name,
+                min=min_value,
+                max=max_value,
+                num=param.numel(),
+                sum=sum_value,
+                sum_squares=sum_squares,
+                bucket_limits=bucket_limits,
+                bucket_counts=summary[4:],
+                global_step=epoch,
+                )
+
+    def update_norms(self, epoch: int):
+        norms = [None] * len(self._params)
+        with torch.no_grad():
+            for group in self._group_by_device([param.detach() for _, param in self._params]).values():
+                indices, tensors = zip(*group)
+                try:
+                    # single fused kernel over all parameters of the device, private api so it may be missing
+                    group_norms = torch._foreach_norm(list(tensors))
+                except (AttributeError, RuntimeError):
+                    group_norms = [torch.linalg.vector_norm(tensor) for tensor in tensors]
+
+                for index, norm in zip(indices, torch.stack(group_norms).tolist()):
+                    norms[index] = norm
+
+        for (name, _), norm in zip(self._params, norms):
+            self.writer.add_scalar(f"Norm/{name}", norm, epoch)
 
     def parse_key(self, key: str):
         if key.startswith("val_"):
@@ -236,13 +362,35 @@ class TensorBoard(Callback):
         else:
             return f"{key.capitalize()}/train"
 
+    def get_tag(self, key: str):
+        tag = self._key_cache.get(key)
+        if tag is None:
+            tag = self._key_cache[key] = self.parse_key(key)
+        return tag
+
+    def on_train_batch_end(self, batch: int, logs=None):
+        self._train_step += 1
+        if not self.scalar_every_n_batches or self._train_step % self.scalar_every_n_batches != 0:
+            return
+
+        logs = logs or {}
+        for key, value in logs.items():
+            self.writer.add_scalar(f"{self.get_tag(key)}_batch", value, self._train_step)
+
     def on_epoch_end(self, epoch: int, logs=None):
         logs = logs or {}
         for key, value in logs.items():
-            self.writer.add_scalar(self.parse_key(key), value, epoch)
+            self.writer.add_scalar(self.get_tag(key), value, epoch)
 
         self.update_lr(epoch)
-        self.update_histogram(epoch)
+        if self.histogram_every_n_epochs and epoch % self.histogram_every_n_epochs == 0:
+            self.update_histogram(epoch)
+
+        if self.log_param_norms:
+            self.update_norms(epoch)
+
+        # write all events of this epoch to disk at once
+        self.writer.flush()
 
     def on_train_end(self, logs=None):
         self.writer.close()
@@ -290,26 +438,36 @@ class Model2onnx(Callback):
         self.dynamic_axes = dynamic_axes
         self.verbose = verbose
         self.metadata = metadata
+        self._dummy = None
         
         self.onnx_model_path = saved_model_path.replace(".pt", ".onnx")
 
     def on_train_end(self, logs=None):
-        self.model.model.load_state_dict(torch.load(self.saved_model_path))
+        # imported lazily, onnx exporter is only needed when this callback is used
+        import onnx
+        import torch.onnx
 
-        # place model on cpu
+        # place model on cpu first, so loading the cpu checkpoint into it needs no device copies
         self.model.model.to("cpu")
+        self.model.model.load_state_dict(torch.load(self.saved_model_path, map_location="cpu", weights_only=True))
 
         # set the model to inference mode
         self.model.model.eval()
         
-        # convert the model to ONNX format
-        dummy_input = torch.randn(self.input_shape)
+        # convert the model to ONNX format, tracing only needs input shape and dtype so zeros are reused
+        if self._dummy is None:
+            self._dummy = torch.zeros(self.input_shape)
+        dummy_input = self._dummy
+
+        # export to memory when metadata has to be added, so the model is serialized to disk only once
+        add_metadata = bool(self.metadata) and isinstance(self.metadata, dict)
+        export_target = io.BytesIO() if add_metadata else self.onnx_model_path
 
         # Export the model
         torch.onnx.export(
             self.model.model,               
             dummy_input,                         
-            self.onnx_model_path,   
+            export_target,   
             export_params=self.export_params,        
             opset_version=self.opset_version,          
             do_constant_folding=self.do_constant_folding,  
@@ -317,13 +475,10 @@ class Model2onnx(Callback):
             output_names = self.output_names, 
             dynamic_axes = self.dynamic_axes,
             )
-        
-        if self.verbose:
-            self.logger.info(f"Model saved to {self.onnx_model_path}")
 
-        if self.metadata and isinstance(self.metadata, dict):
-            # Load the ONNX model
-            onnx_model = onnx.load(self.onnx_model_path)
+        if add_metadata:
+            # Load the ONNX model from the in-memory buffer
+            onnx_model = onnx.load_from_string(export_target.getvalue())
 
             # Add the metadata dictionary to the model's metadata_props attribute
             for key, value in self.metadata.items():
@@ -334,6 +489,9 @@ class Model2onnx(Callback):
             # Save the modified ONNX model
             onnx.save(onnx_model, self.onnx_model_path)
 
+        if self.verbose:
+            self.logger.info(f"Model saved to {self.onnx_model_path}")
+
 class ReduceLROnPlateau(Callback):
     """ Reduce learning rate when a metric has stopped improving.
     Models often benefit from reducing the learning rate by a factor of 2-10 once learning stagnates.
@@ -372,7 +530,7 @@ class ReduceLROnPlateau(Callback):
 
     def on_train_begin(self, logs=None):
         self.wait = 0
-        self.best = np.inf if self.mode == "min" or self.mode == "min_equal" else -np.Inf
+        self.best = math.inf if self.mode in ("min", "min_equal") else -math.inf
 
     def on_epoch_end(self, epoch: int, logs=None):
         current = self.get_monitor_value(logs)